@@ -0,0 +1,89 @@
+"""``bigdata-mongo-taxi`` command line entry point.
+
+Pipeline modules pull in polars, pydantic and pymongo, so they are imported
+inside each command handler; ``--help`` only pays for argparse.
+"""
+
+from __future__ import annotations
+
+import argparse
+from pathlib import Path
+from typing import Sequence
+
+
+def _ingest(args: argparse.Namespace) -> None:
+    from .pipeline.raw_ingest import ingest_csv_to_mongo
+
+    ingest_csv_to_mongo(args.csv_path, batch_size=args.batch_size)
+
+
+def _clean(args: argparse.Namespace) -> None:
+    from .pipeline.clean_transform import clean_raw_collection
+
+    clean_raw_collection(batch_size=args.batch_size)
+
+
+def _aggregate(args: argparse.Namespace) -> None:
+    from .pipeline.aggregate import aggregate_clean_collection
+
+    aggregate_clean_collection()
+
+
+def _od_matrix(args: argparse.Namespace) -> None:
+    from .pipeline.od_matrix import build_od_matrix
+
+    build_od_matrix(batch_size=args.batch_size)
+
+
+def _run(args: argparse.Namespace) -> None:
+    from .pipeline.orchestrate import run_pipeline
+
+    run_pipeline(args.csv_path, batch_size=args.batch_size, queue_size=args.queue_size)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="bigdata-mongo-taxi",
+        description="NYC taxi bronze/silver/gold pipeline on MongoDB",
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    ingest = commands.add_parser("ingest", help="Load a TLC CSV/Parquet file into trips_raw")
+    ingest.add_argument("csv_path", type=Path, help="Path to yellow_tripdata CSV or Parquet file")
+    ingest.add_argument("--batch-size", type=int, default=10_000)
+    ingest.set_defaults(handler=_ingest)
+
+    clean = commands.add_parser("clean", help="Clean trips_raw into trips_clean")
+    clean.add_argument("--batch-size", type=int, default=5_000)
+    clean.set_defaults(handler=_clean)
+
+    aggregate = commands.add_parser("aggregate", help="Rebuild trips_gold_* from trips_clean")
+    aggregate.set_defaults(handler=_aggregate)
+
+    od_matrix = commands.add_parser("od-matrix", help="Rebuild trips_gold_od from trips_clean")
+    od_matrix.add_argument("--batch-size", type=int, default=50_000)
+    od_matrix.set_defaults(handler=_od_matrix)
+
+    run = commands.add_parser(
+        "run", help="Stream ingest -> clean -> aggregate with overlapped stages"
+    )
+    run.add_argument("csv_path", type=Path, help="Path to yellow_tripdata CSV or Parquet file")
+    run.add_argument("--batch-size", type=int, default=10_000)
+    run.add_argument(
+        "--queue-size",
+        type=int,
+        default=4,
+        help="Batches buffered between stages before upstream blocks",
+    )
+    run.set_defaults(handler=_run)
+
+    return parser
+
+
+def main(argv: Sequence[str] | None = None) -> None:
+    args = build_parser().parse_args(argv)
+    args.handler(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -5,6 +5,7 @@ from pydantic_settings import BaseSettings
 class Settings(BaseSettings):
     mongo_uri: str = "mongodb://localhost:27017/?replicaSet=rs0"
     mongo_db: str = "nyc_taxi"
+    zone_lookup_path: str = "data/raw/taxi_zone_lookup.csv"
 
     class Config:
         env_file = ".env"
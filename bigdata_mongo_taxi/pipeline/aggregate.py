@@ -71,16 +71,7 @@ def _write_dataframe(df: pl.DataFrame, collection: Collection, index_field: str)
     return len(payload)
 
 
-def aggregate_clean_collection() -> None:
-    setup_logging()
-    logger = logging.getLogger(__name__)
-
-    clean_docs = list(_collection("trips_clean").find({}, {"_id": 0}))
-    if not clean_docs:
-        logger.warning("No cleaned records found; skipping aggregation.")
-        return
-
-    clean_df = pl.DataFrame(clean_docs)
+def write_gold_metrics(clean_df: pl.DataFrame) -> tuple[int, int, int]:
     daily_df = compute_daily_metrics(clean_df)
     zone_df = compute_top_zones(clean_df)
     payment_df = compute_payment_breakdown(clean_df)
@@ -90,6 +81,26 @@ def aggregate_clean_collection() -> None:
     payment_count = _write_dataframe(
         payment_df, _collection("trips_gold_payment"), "payment_type_label"
     )
+    return daily_count, zone_count, payment_count
+
+
+def load_clean_frame() -> pl.DataFrame:
+    clean_docs = list(_collection("trips_clean").find({}, {"_id": 0}))
+    if not clean_docs:
+        return pl.DataFrame()
+    return pl.DataFrame(clean_docs)
+
+
+def aggregate_clean_collection() -> None:
+    setup_logging()
+    logger = logging.getLogger(__name__)
+
+    clean_df = load_clean_frame()
+    if clean_df.is_empty():
+        logger.warning("No cleaned records found; skipping aggregation.")
+        return
+
+    daily_count, zone_count, payment_count = write_gold_metrics(clean_df)
 
     logger.info(
         "Aggregation complete daily=%s zones=%s payment=%s",
@@ -2,7 +2,7 @@ from __future__ import annotations
 
 import logging
 from datetime import datetime, timezone
-from typing import Any, Iterable
+from typing import Any, Iterable, Iterator
 
 from pymongo import InsertOne
 from pymongo.collection import Collection
@@ -95,14 +95,12 @@ def tidy_record(raw_doc: dict[str, Any]) -> CleanTaxiTrip | None:
     return clean_trip
 
 
-def process_batch(
+def tidy_batch(
     raw_records: Iterable[dict[str, Any]],
-    clean_collection: Collection,
     dedupe_keys: set[tuple[Any, ...]],
     logger: logging.Logger,
-) -> int:
-    operations: list[InsertOne] = []
-    inserted = 0
+) -> list[dict[str, Any]]:
+    docs: list[dict[str, Any]] = []
 
     for raw_doc in raw_records:
         clean_trip = tidy_record(raw_doc)
@@ -120,26 +118,30 @@ def process_batch(
             continue
         dedupe_keys.add(key)
 
-        operations.append(InsertOne(clean_trip.model_dump(by_alias=True)))
+        docs.append(clean_trip.model_dump(by_alias=True))
+
+    return docs
 
-        if len(operations) >= BATCH_SIZE:
-            result = clean_collection.bulk_write(operations, ordered=False)
-            inserted += result.inserted_count
-            operations.clear()
 
-    if operations:
+def _write_clean(docs: list[dict[str, Any]], clean_collection: Collection) -> int:
+    inserted = 0
+    for start in range(0, len(docs), BATCH_SIZE):
+        operations = [InsertOne(doc) for doc in docs[start : start + BATCH_SIZE]]
         result = clean_collection.bulk_write(operations, ordered=False)
         inserted += result.inserted_count
-
     return inserted
 
 
-def clean_raw_collection(batch_size: int = BATCH_SIZE) -> None:
-    setup_logging()
-    logger = logging.getLogger(__name__)
-    db = get_db()
-    raw_collection = db["trips_raw"]
-    clean_collection = db["trips_clean"]
+def process_batch(
+    raw_records: Iterable[dict[str, Any]],
+    clean_collection: Collection,
+    dedupe_keys: set[tuple[Any, ...]],
+    logger: logging.Logger,
+) -> int:
+    return _write_clean(tidy_batch(raw_records, dedupe_keys, logger), clean_collection)
+
+
+def ensure_clean_indexes(clean_collection: Collection) -> None:
     clean_collection.create_index(
         [
             ("VendorID", 1),
@@ -151,6 +153,29 @@ def clean_raw_collection(batch_size: int = BATCH_SIZE) -> None:
         unique=True,
     )
 
+
+def clean_batches(
+    raw_batches: Iterable[list[dict[str, Any]]],
+    clean_collection: Collection,
+    logger: logging.Logger,
+) -> Iterator[list[dict[str, Any]]]:
+    """Clean and insert each incoming raw batch, yielding the written documents."""
+    dedupe_cache: set[tuple[Any, ...]] = set()
+    for raw_batch in raw_batches:
+        docs = tidy_batch(raw_batch, dedupe_cache, logger)
+        if docs:
+            _write_clean(docs, clean_collection)
+            yield docs
+
+
+def clean_raw_collection(batch_size: int = BATCH_SIZE) -> None:
+    setup_logging()
+    logger = logging.getLogger(__name__)
+    db = get_db()
+    raw_collection = db["trips_raw"]
+    clean_collection = db["trips_clean"]
+    ensure_clean_indexes(clean_collection)
+
     logger.info("Starting clean pipeline, batch_size=%s", batch_size)
     cursor = raw_collection.find({}, batch_size=batch_size)
     dedupe_cache: set[tuple[Any, ...]] = set()
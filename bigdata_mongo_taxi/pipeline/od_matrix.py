@@ -0,0 +1,256 @@
+from __future__ import annotations
+
+import logging
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Iterable
+
+import numpy as np
+import polars as pl
+from pymongo.collection import Collection
+
+from ..config import settings
+from ..db.mongo_client import get_db
+from ..logging_conf import setup_logging
+
+BATCH_SIZE = 50_000
+# TLC LocationIDs run 1..265; index 0 is left unused so IDs index the matrix directly.
+N_ZONES = 266
+OD_FIELDS = (
+    "pickup_location_id",
+    "dropoff_location_id",
+    "total_amount",
+    "trip_duration_minutes",
+)
+UNKNOWN_BOROUGH = "Unknown"
+
+# Packed little-endian layouts used for the per-origin arrays stored in MongoDB.
+_ID_DTYPE = np.dtype("<u2")
+_TRIPS_DTYPE = np.dtype("<u4")
+_AMOUNT_DTYPE = np.dtype("<f8")
+
+
+class ODMatrix:
+    """Dense zone-to-zone accumulator for trips, revenue and duration."""
+
+    def __init__(self, n_zones: int = N_ZONES) -> None:
+        self.n_zones = n_zones
+        self.trips = np.zeros((n_zones, n_zones), dtype=np.int64)
+        self.revenue = np.zeros((n_zones, n_zones), dtype=np.float64)
+        self.duration = np.zeros((n_zones, n_zones), dtype=np.float64)
+
+    def update(
+        self,
+        pickups: np.ndarray,
+        dropoffs: np.ndarray,
+        amounts: np.ndarray,
+        durations: np.ndarray,
+    ) -> int:
+        """Add one batch of trips; rows with out-of-range zone IDs are dropped."""
+        pickups = np.asarray(pickups, dtype=np.int64)
+        dropoffs = np.asarray(dropoffs, dtype=np.int64)
+        valid = (
+            (pickups >= 0)
+            & (pickups < self.n_zones)
+            & (dropoffs >= 0)
+            & (dropoffs < self.n_zones)
+        )
+        flat = pickups[valid] * self.n_zones + dropoffs[valid]
+        size = self.n_zones * self.n_zones
+
+        self.trips += np.bincount(flat, minlength=size).reshape(self.trips.shape)
+        self.revenue += np.bincount(
+            flat,
+            weights=np.asarray(amounts, dtype=np.float64)[valid],
+            minlength=size,
+        ).reshape(self.revenue.shape)
+        self.duration += np.bincount(
+            flat,
+            weights=np.asarray(durations, dtype=np.float64)[valid],
+            minlength=size,
+        ).reshape(self.duration.shape)
+        return int(flat.size)
+
+    def update_documents(
+        self, docs: Iterable[dict[str, Any]], batch_size: int = BATCH_SIZE
+    ) -> int:
+        """Stream trip documents through reusable per-batch column buffers."""
+        pickups = np.empty(batch_size, dtype=np.int64)
+        dropoffs = np.empty(batch_size, dtype=np.int64)
+        amounts = np.empty(batch_size, dtype=np.float64)
+        durations = np.empty(batch_size, dtype=np.float64)
+        filled = 0
+        total = 0
+
+        for doc in docs:
+            pickups[filled] = doc.get("pickup_location_id") or -1
+            dropoffs[filled] = doc.get("dropoff_location_id") or -1
+            amounts[filled] = doc.get("total_amount") or 0.0
+            durations[filled] = doc.get("trip_duration_minutes") or 0.0
+            filled += 1
+            if filled == batch_size:
+                total += self.update(pickups, dropoffs, amounts, durations)
+                filled = 0
+
+        if filled:
+            total += self.update(
+                pickups[:filled], dropoffs[:filled], amounts[:filled], durations[:filled]
+            )
+        return total
+
+    def mean_duration(self) -> np.ndarray:
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = self.duration / self.trips
+        return np.nan_to_num(mean)
+
+    def to_documents(self) -> list[dict[str, Any]]:
+        """Pack each non-empty origin row into a single document of binary arrays."""
+        docs: list[dict[str, Any]] = []
+        for origin in np.flatnonzero(self.trips.sum(axis=1)):
+            row = self.trips[origin]
+            destinations = np.flatnonzero(row)
+            docs.append(
+                {
+                    "pickup_location_id": int(origin),
+                    "total_trips": int(row.sum()),
+                    "total_revenue": float(self.revenue[origin].sum()),
+                    "dropoff_location_ids": destinations.astype(_ID_DTYPE).tobytes(),
+                    "trips": row[destinations].astype(_TRIPS_DTYPE).tobytes(),
+                    "revenue": self.revenue[origin, destinations]
+                    .astype(_AMOUNT_DTYPE)
+                    .tobytes(),
+                    "duration_minutes": self.duration[origin, destinations]
+                    .astype(_AMOUNT_DTYPE)
+                    .tobytes(),
+                }
+            )
+        return docs
+
+    @classmethod
+    def from_documents(
+        cls, docs: Iterable[dict[str, Any]], n_zones: int = N_ZONES
+    ) -> "ODMatrix":
+        matrix = cls(n_zones)
+        for doc in docs:
+            origin = int(doc["pickup_location_id"])
+            destinations = np.frombuffer(doc["dropoff_location_ids"], dtype=_ID_DTYPE)
+            matrix.trips[origin, destinations] = np.frombuffer(
+                doc["trips"], dtype=_TRIPS_DTYPE
+            )
+            matrix.revenue[origin, destinations] = np.frombuffer(
+                doc["revenue"], dtype=_AMOUNT_DTYPE
+            )
+            matrix.duration[origin, destinations] = np.frombuffer(
+                doc["duration_minutes"], dtype=_AMOUNT_DTYPE
+            )
+        return matrix
+
+
+def top_flows(matrix: ODMatrix, limit: int = 10) -> pl.DataFrame:
+    flat_trips = matrix.trips.ravel()
+    nonzero = np.count_nonzero(flat_trips)
+    limit = min(limit, nonzero)
+    if limit <= 0:
+        return pl.DataFrame()
+
+    candidates = np.argpartition(flat_trips, -limit)[-limit:]
+    ordered = candidates[np.argsort(flat_trips[candidates], kind="stable")[::-1]]
+    pickups, dropoffs = np.divmod(ordered, matrix.n_zones)
+    return pl.DataFrame(
+        {
+            "pickup_location_id": pickups,
+            "dropoff_location_id": dropoffs,
+            "total_trips": flat_trips[ordered],
+            "total_revenue": matrix.revenue.ravel()[ordered],
+            "avg_duration_minutes": matrix.mean_duration().ravel()[ordered],
+        }
+    )
+
+
+@lru_cache(maxsize=4)
+def load_zone_lookup(path: str | None = None) -> pl.DataFrame:
+    """Read the TLC taxi zone lookup CSV once per process."""
+    lookup_path = Path(path or settings.zone_lookup_path)
+    if not lookup_path.exists():
+        logging.getLogger(__name__).warning(
+            "Zone lookup %s not found; boroughs will be reported as %s.",
+            lookup_path,
+            UNKNOWN_BOROUGH,
+        )
+        return pl.DataFrame(
+            schema={"location_id": pl.Int64, "borough": pl.Utf8, "zone": pl.Utf8}
+        )
+
+    return pl.read_csv(lookup_path).select(
+        pl.col("LocationID").cast(pl.Int64).alias("location_id"),
+        pl.col("Borough").fill_null(UNKNOWN_BOROUGH).alias("borough"),
+        pl.col("Zone").alias("zone"),
+    )
+
+
+def borough_rollup(matrix: ODMatrix, zones: pl.DataFrame) -> pl.DataFrame:
+    boroughs = sorted(set(zones["borough"].to_list()) | {UNKNOWN_BOROUGH})
+    codes = np.full(matrix.n_zones, boroughs.index(UNKNOWN_BOROUGH), dtype=np.int64)
+    in_range = zones.filter(
+        (pl.col("location_id") >= 0) & (pl.col("location_id") < matrix.n_zones)
+    )
+    codes[in_range["location_id"].to_numpy()] = [
+        boroughs.index(name) for name in in_range["borough"].to_list()
+    ]
+
+    # One-hot zone -> borough projection collapses the zone matrix in two matmuls.
+    membership = np.zeros((matrix.n_zones, len(boroughs)), dtype=np.float64)
+    membership[np.arange(matrix.n_zones), codes] = 1.0
+    trips = membership.T @ matrix.trips @ membership
+    revenue = membership.T @ matrix.revenue @ membership
+    duration = membership.T @ matrix.duration @ membership
+
+    origin, destination = np.nonzero(trips)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        avg_duration = duration[origin, destination] / trips[origin, destination]
+    return pl.DataFrame(
+        {
+            "pickup_borough": [boroughs[i] for i in origin],
+            "dropoff_borough": [boroughs[i] for i in destination],
+            "total_trips": trips[origin, destination].astype(np.int64),
+            "total_revenue": revenue[origin, destination],
+            "avg_duration_minutes": avg_duration,
+        }
+    ).sort("total_trips", descending=True)
+
+
+def write_od_matrix(matrix: ODMatrix, collection: Collection | None = None) -> int:
+    if collection is None:
+        collection = get_db()["trips_gold_od"]
+    payload = matrix.to_documents()
+    collection.delete_many({})
+    if payload:
+        collection.insert_many(payload)
+        collection.create_index("pickup_location_id", unique=True)
+    return len(payload)
+
+
+def build_od_matrix(batch_size: int = BATCH_SIZE) -> None:
+    setup_logging()
+    logger = logging.getLogger(__name__)
+    db = get_db()
+
+    logger.info("Starting OD matrix aggregation, batch_size=%s", batch_size)
+    projection = {field: 1 for field in OD_FIELDS} | {"_id": 0}
+    cursor = db["trips_clean"].find({}, projection, batch_size=batch_size)
+
+    matrix = ODMatrix()
+    total_trips = matrix.update_documents(cursor, batch_size)
+
+    # An empty matrix still goes through write_od_matrix so stale flows are cleared.
+    if total_trips == 0:
+        logger.warning("No cleaned records found; clearing OD matrix.")
+
+    origin_count = write_od_matrix(matrix, db["trips_gold_od"])
+    logger.info(
+        "OD matrix complete trips=%s origins=%s", total_trips, origin_count
+    )
+
+
+if __name__ == "__main__":
+    build_od_matrix()
@@ -0,0 +1,227 @@
+from __future__ import annotations
+
+import logging
+import queue
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Iterable, Iterator, get_args
+
+import polars as pl
+from pydantic import BaseModel
+
+from ..db.mongo_client import get_db
+from ..db.schemas import CleanTaxiTrip
+from ..logging_conf import setup_logging
+from .aggregate import load_clean_frame, write_gold_metrics
+from .clean_transform import clean_batches, ensure_clean_indexes
+from .od_matrix import ODMatrix, write_od_matrix
+from .raw_ingest import BATCH_SIZE, ingest_batches
+
+QUEUE_SIZE = 4
+_POLL_SECONDS = 0.1
+_DONE = object()
+
+Stage = Callable[[Iterable[Any]], Iterable[Any]]
+
+_POLARS_TYPES: dict[type, pl.DataType] = {
+    int: pl.Int64(),
+    float: pl.Float64(),
+    str: pl.Utf8(),
+    datetime: pl.Datetime("us", "UTC"),
+}
+
+
+def _polars_schema(model: type[BaseModel]) -> dict[str, pl.DataType]:
+    """Map a model's dumped (by-alias) fields to Polars dtypes, unwrapping ``X | None``."""
+    schema: dict[str, pl.DataType] = {}
+    for name, field in model.model_fields.items():
+        annotation = field.annotation
+        if annotation not in _POLARS_TYPES:
+            annotation = next(arg for arg in get_args(annotation) if arg is not type(None))
+        schema[field.alias or name] = _POLARS_TYPES[annotation]
+    return schema
+
+
+# Fixed schema so batches with long runs of nulls (rate_code_id, store_and_fwd_flag)
+# don't get a column type inferred from the first rows only.
+CLEAN_SCHEMA = _polars_schema(CleanTaxiTrip)
+
+
+def _put(
+    channel: queue.Queue, item: Any, stop: threading.Event, closed: threading.Event
+) -> bool:
+    while not (stop.is_set() or closed.is_set()):
+        try:
+            channel.put(item, timeout=_POLL_SECONDS)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def _drain(channel: queue.Queue, stop: threading.Event) -> Iterator[Any]:
+    while True:
+        try:
+            item = channel.get(timeout=_POLL_SECONDS)
+        except queue.Empty:
+            if stop.is_set():
+                return
+            continue
+        if item is _DONE:
+            return
+        yield item
+
+
+def run_stages(
+    source: Iterable[Any],
+    stages: list[Stage],
+    sink: Callable[[Iterable[Any]], Any],
+    queue_size: int = QUEUE_SIZE,
+) -> Any:
+    """Run ``source -> stages -> sink`` concurrently, linked by bounded queues.
+
+    Each stage runs in its own thread and receives the upstream batches as an
+    iterator, so it starts as soon as the first batch arrives. A stage or sink
+    that returns before draining its input closes that queue, which ends the
+    producers feeding it. The first exception raised by any stage stops the
+    others and is re-raised here.
+    """
+    stop = threading.Event()
+    errors: list[BaseException] = []
+    channels: list[queue.Queue] = [
+        queue.Queue(maxsize=queue_size) for _ in range(len(stages) + 1)
+    ]
+    # closed[i] is set once the consumer of channels[i] has stopped reading.
+    closed = [threading.Event() for _ in channels]
+
+    def produce(items: Callable[[], Iterable[Any]], out: int) -> None:
+        try:
+            for item in items():
+                if not _put(channels[out], item, stop, closed[out]):
+                    return
+        except BaseException as exc:
+            errors.append(exc)
+            stop.set()
+        finally:
+            _put(channels[out], _DONE, stop, closed[out])
+            if out > 0:
+                closed[out - 1].set()
+
+    threads = [
+        threading.Thread(target=produce, args=(lambda: source, 0), name="stage-0")
+    ]
+    for index, stage in enumerate(stages, start=1):
+        upstream = channels[index - 1]
+        threads.append(
+            threading.Thread(
+                target=produce,
+                args=(
+                    lambda stage=stage, upstream=upstream: stage(_drain(upstream, stop)),
+                    index,
+                ),
+                name=f"stage-{index}",
+            )
+        )
+
+    for thread in threads:
+        thread.start()
+    try:
+        result = sink(_drain(channels[-1], stop))
+    except BaseException:
+        stop.set()
+        raise
+    finally:
+        closed[-1].set()
+        for thread in threads:
+            thread.join()
+
+    if errors:
+        raise errors[0]
+    return result
+
+
+def aggregate_batches(
+    clean_batches: Iterable[list[dict[str, Any]]],
+    matrix: ODMatrix | None = None,
+    keep_frames: bool = True,
+) -> tuple[ODMatrix, pl.DataFrame]:
+    """Fold cleaned batches into the OD matrix and collect them for gold metrics.
+
+    ``matrix`` seeds the accumulator with previously loaded flows; with
+    ``keep_frames=False`` only the matrix is built. Nothing is written here:
+    the sink cannot tell a finished stream from an aborted one, so the caller
+    persists the result only once every stage has succeeded.
+    """
+    if matrix is None:
+        matrix = ODMatrix()
+    frames: list[pl.DataFrame] = []
+    for docs in clean_batches:
+        matrix.update_documents(docs, batch_size=len(docs))
+        if keep_frames:
+            frames.append(pl.DataFrame(docs, schema=CLEAN_SCHEMA))
+
+    if not frames:
+        return matrix, pl.DataFrame()
+    return matrix, pl.concat(frames)
+
+
+def run_pipeline(
+    csv_path: Path, batch_size: int = BATCH_SIZE, queue_size: int = QUEUE_SIZE
+) -> None:
+    """Chain ingest -> clean -> aggregate for one file on a shared Mongo client.
+
+    The OD matrix is always folded in the streamed aggregate stage. On an
+    empty ``trips_clean`` the daily/zone/payment metrics come from the
+    streamed batches too. If earlier loads are already present, the matrix is
+    seeded from ``trips_gold_od`` and those group-bys are rebuilt from the full
+    ``trips_clean`` once streaming finishes, so earlier months stay in gold.
+    """
+    setup_logging()
+    logger = logging.getLogger(__name__)
+    db = get_db()
+    clean_collection = db["trips_clean"]
+    ensure_clean_indexes(clean_collection)
+    has_previous_loads = clean_collection.count_documents({}, limit=1) > 0
+
+    logger.info(
+        "Starting pipelined run from %s, batch_size=%s queue_size=%s",
+        csv_path,
+        batch_size,
+        queue_size,
+    )
+    source = ingest_batches(csv_path, db["trips_raw"], logger, batch_size)
+    stages: list[Stage] = [lambda raw: clean_batches(raw, clean_collection, logger)]
+
+    if has_previous_loads:
+        logger.info(
+            "trips_clean already holds documents; "
+            "daily/zone/payment gold will be rebuilt from the full collection."
+        )
+        seed = ODMatrix.from_documents(db["trips_gold_od"].find({}, {"_id": 0}))
+        matrix, _ = run_stages(
+            source,
+            stages,
+            lambda batches: aggregate_batches(batches, seed, keep_frames=False),
+            queue_size=queue_size,
+        )
+        clean_df = load_clean_frame()
+    else:
+        matrix, clean_df = run_stages(
+            source, stages, aggregate_batches, queue_size=queue_size
+        )
+
+    if clean_df.is_empty():
+        logger.warning("No cleaned records produced; skipping aggregation.")
+        return
+
+    od_count = write_od_matrix(matrix)
+    daily_count, zone_count, payment_count = write_gold_metrics(clean_df)
+    logger.info(
+        "Pipelined run complete clean=%s daily=%s zones=%s payment=%s od=%s",
+        clean_df.height,
+        daily_count,
+        zone_count,
+        payment_count,
+        od_count,
+    )
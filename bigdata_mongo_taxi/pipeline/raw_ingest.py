@@ -1,9 +1,11 @@
 import argparse
 import logging
 from pathlib import Path
+from typing import Any, Iterator
 
 import polars as pl
 from pymongo import InsertOne
+from pymongo.collection import Collection
 
 from ..logging_conf import setup_logging
 from ..db.mongo_client import get_db
@@ -12,37 +14,58 @@ from ..db.schemas import TaxiTrip
 BATCH_SIZE = 10_000
 
 
-def ingest_csv_to_mongo(csv_path: Path) -> None:
-    setup_logging()
-    logger = logging.getLogger(__name__)
+def _iter_trip_slices(csv_path: Path, batch_size: int) -> Iterator[pl.DataFrame]:
+    """Yield ``batch_size`` row slices as they are parsed, never the whole file."""
+    if csv_path.suffix.lower() == ".parquet":
+        lazy_df = pl.scan_parquet(csv_path)
+        total_rows = lazy_df.select(pl.len()).collect().item()
+        for offset in range(0, total_rows, batch_size):
+            yield lazy_df.slice(offset, batch_size).collect()
+        return
+
+    reader = pl.read_csv_batched(
+        csv_path, batch_size=batch_size, infer_schema_length=10_000, low_memory=True
+    )
+    while chunks := reader.next_batches(1):
+        for chunk in chunks:
+            yield from chunk.iter_slices(batch_size)
+
 
+def ingest_batches(
+    csv_path: Path,
+    collection: Collection,
+    logger: logging.Logger,
+    batch_size: int = BATCH_SIZE,
+) -> Iterator[list[dict[str, Any]]]:
+    """Validate and insert ``csv_path`` slice by slice, yielding each written batch."""
     if not csv_path.exists():
         raise FileNotFoundError(f"{csv_path} not found")
 
-    db = get_db()
-    collection = db["trips_raw"]
-
     logger.info("Starting ingestion from %s", csv_path)
 
-    if csv_path.suffix.lower() == ".parquet":
-        df = pl.read_parquet(csv_path)
-    else:
-        df = pl.read_csv(csv_path, infer_schema_length=10_000, low_memory=True)
-    total_inserted = 0
-    for batch_df in df.iter_slices(BATCH_SIZE):
-        records: list[InsertOne] = []
+    for batch_df in _iter_trip_slices(csv_path, batch_size):
+        docs: list[dict[str, Any]] = []
 
         for row in batch_df.to_dicts():
             try:
                 trip = TaxiTrip(**row)
-                doc = trip.model_dump(by_alias=True)
-                records.append(InsertOne(doc))
+                docs.append(trip.model_dump(by_alias=True))
             except Exception as exc:
                 logger.debug("Skipping invalid row: %s", exc)
 
-        if records:
-            result = collection.bulk_write(records, ordered=False)
-            total_inserted += result.inserted_count
+        if docs:
+            collection.bulk_write([InsertOne(doc) for doc in docs], ordered=False)
+            yield docs
+
+
+def ingest_csv_to_mongo(csv_path: Path, batch_size: int = BATCH_SIZE) -> None:
+    setup_logging()
+    logger = logging.getLogger(__name__)
+
+    collection = get_db()["trips_raw"]
+    total_inserted = 0
+    for docs in ingest_batches(csv_path, collection, logger, batch_size):
+        total_inserted += len(docs)
 
     logger.info("Finished ingestion inserted=%s", total_inserted)
 
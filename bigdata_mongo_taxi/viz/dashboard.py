@@ -11,6 +11,12 @@ if str(ROOT) not in sys.path:
     sys.path.insert(0, str(ROOT))
 
 from bigdata_mongo_taxi.db.mongo_client import get_db
+from bigdata_mongo_taxi.pipeline.od_matrix import (
+    ODMatrix,
+    borough_rollup,
+    load_zone_lookup,
+    top_flows,
+)
 
 
 st.set_page_config(page_title="NYC Taxi Gold Metrics", layout="wide")
@@ -25,6 +31,11 @@ def load_collection(name: str) -> pl.DataFrame:
     return pl.DataFrame(docs)
 
 
+@st.cache_data(ttl=300)
+def load_od_matrix() -> ODMatrix:
+    return ODMatrix.from_documents(db["trips_gold_od"].find({}, {"_id": 0}))
+
+
 def summarize_daily(df: pl.DataFrame) -> tuple[float, int, float]:
     if df.is_empty():
         return 0.0, 0, 0.0
@@ -122,3 +133,48 @@ with col2:
         f"{payment_pd.loc[focus_payment, 'total_trips']:,} trips "
         f"and ${payment_pd.loc[focus_payment, 'total_revenue']:,.0f} revenue."
     )
+
+st.markdown("---")
+
+st.subheader("Top Origin–Destination Flows")
+od_matrix = load_od_matrix()
+if not od_matrix.trips.any():
+    st.info("OD matrix is empty. Run `python -m bigdata_mongo_taxi.pipeline.od_matrix`.")
+else:
+    zones = load_zone_lookup()
+    flow_limit = st.slider("OD flows to display", min_value=5, max_value=50, value=15)
+    flows_df = top_flows(od_matrix, limit=flow_limit)
+    if not zones.is_empty():
+        zone_names = zones.select("location_id", "zone")
+        flows_df = (
+            flows_df.join(
+                zone_names.rename(
+                    {"location_id": "pickup_location_id", "zone": "pickup_zone"}
+                ),
+                on="pickup_location_id",
+                how="left",
+            )
+            .join(
+                zone_names.rename(
+                    {"location_id": "dropoff_location_id", "zone": "dropoff_zone"}
+                ),
+                on="dropoff_location_id",
+                how="left",
+            )
+        )
+    flows_pd = flows_df.with_columns(
+        (
+            pl.col("pickup_location_id").cast(pl.Utf8)
+            + " → "
+            + pl.col("dropoff_location_id").cast(pl.Utf8)
+        ).alias("flow")
+    ).to_pandas().set_index("flow")
+
+    od_col1, od_col2 = st.columns(2)
+    with od_col1:
+        st.bar_chart(flows_pd["total_trips"])
+        st.dataframe(flows_pd)
+    with od_col2:
+        st.markdown("**Borough Rollup**")
+        st.dataframe(borough_rollup(od_matrix, zones).to_pandas())
+        st.caption("Zone names and boroughs come from the TLC taxi zone lookup CSV.")
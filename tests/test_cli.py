@@ -0,0 +1,40 @@
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from bigdata_mongo_taxi.cli import build_parser
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+def test_run_command_parses_pipeline_options() -> None:
+    args = build_parser().parse_args(
+        ["run", "data/raw/trips.csv", "--batch-size", "500", "--queue-size", "2"]
+    )
+    assert args.csv_path == Path("data/raw/trips.csv")
+    assert args.batch_size == 500
+    assert args.queue_size == 2
+
+
+def test_missing_command_exits() -> None:
+    with pytest.raises(SystemExit):
+        build_parser().parse_args([])
+
+
+def test_help_does_not_import_heavy_modules() -> None:
+    script = (
+        "import sys\n"
+        "from bigdata_mongo_taxi.cli import main\n"
+        "try:\n"
+        "    main(['--help'])\n"
+        "except SystemExit:\n"
+        "    pass\n"
+        "heavy = {'polars', 'pydantic', 'pymongo', 'numpy'} & set(sys.modules)\n"
+        "assert not heavy, heavy\n"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", script], cwd=ROOT, capture_output=True, text=True
+    )
+    assert result.returncode == 0, result.stderr
@@ -0,0 +1,158 @@
+from collections import defaultdict
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+import polars as pl
+import pytest
+
+from bigdata_mongo_taxi.pipeline import od_matrix
+from bigdata_mongo_taxi.pipeline.od_matrix import (
+    UNKNOWN_BOROUGH,
+    ODMatrix,
+    borough_rollup,
+    load_zone_lookup,
+    top_flows,
+    write_od_matrix,
+)
+
+
+def _docs() -> list[dict[str, Any]]:
+    return pl.DataFrame(
+        {
+            "pickup_location_id": [132, 132, 132, 236, 999],
+            "dropoff_location_id": [236, 236, 1, 132, 1],
+            "total_amount": [60.0, 70.0, 90.0, 12.0, 5.0],
+            "trip_duration_minutes": [40.0, 50.0, 30.0, 10.0, 5.0],
+        }
+    ).to_dicts()
+
+
+def _matrix() -> ODMatrix:
+    matrix = ODMatrix()
+    matrix.update_documents(_docs())
+    return matrix
+
+
+class _FakeCollection:
+    def __init__(self) -> None:
+        self.docs: list[dict[str, Any]] = [{"pickup_location_id": 1}]
+
+    def delete_many(self, query: dict) -> None:
+        self.docs.clear()
+
+    def insert_many(self, docs: list[dict[str, Any]]) -> None:
+        self.docs.extend(docs)
+
+    def create_index(self, *args: object, **kwargs: object) -> None:
+        pass
+
+    def find(self, *args: object, **kwargs: object) -> list[dict[str, Any]]:
+        return list(self.docs)
+
+
+def test_update_accumulates_cells_and_drops_unknown_zones() -> None:
+    matrix = ODMatrix()
+    assert matrix.update_documents(_docs()) == 4
+    assert matrix.trips[132, 236] == 2
+    assert matrix.revenue[132, 236] == 130.0
+    assert matrix.mean_duration()[132, 236] == 45.0
+    assert matrix.trips.sum() == 4
+
+
+def test_documents_round_trip_per_origin() -> None:
+    matrix = _matrix()
+    docs = matrix.to_documents()
+    assert [doc["pickup_location_id"] for doc in docs] == [132, 236]
+    assert docs[0]["total_trips"] == 3
+
+    restored = ODMatrix.from_documents(docs)
+    assert np.array_equal(restored.trips, matrix.trips)
+    assert np.allclose(restored.revenue, matrix.revenue)
+    assert np.allclose(restored.duration, matrix.duration)
+
+
+def test_top_flows_orders_by_trips() -> None:
+    df = top_flows(_matrix(), limit=2)
+    assert df.shape[0] == 2
+    assert df.row(0, named=True)["pickup_location_id"] == 132
+    assert df.row(0, named=True)["dropoff_location_id"] == 236
+    assert df.row(0, named=True)["total_trips"] == 2
+
+
+def test_borough_rollup_groups_zones() -> None:
+    zones = pl.DataFrame(
+        {
+            "location_id": [1, 132, 236],
+            "borough": ["EWR", "Queens", "Manhattan"],
+            "zone": ["Newark Airport", "JFK Airport", "Upper East Side North"],
+        }
+    )
+    df = borough_rollup(_matrix(), zones)
+    first = df.row(0, named=True)
+    assert (first["pickup_borough"], first["dropoff_borough"]) == ("Queens", "Manhattan")
+    assert first["total_trips"] == 2
+    assert df["total_trips"].sum() == 4
+
+
+def test_update_documents_flushes_partial_buffers() -> None:
+    matrix = ODMatrix()
+    assert matrix.update_documents(_docs(), batch_size=2) == 4
+    assert np.array_equal(matrix.trips, _matrix().trips)
+    assert np.allclose(matrix.revenue, _matrix().revenue)
+    assert np.allclose(matrix.duration, _matrix().duration)
+
+
+def test_update_documents_treats_missing_fields_as_unknown_zone() -> None:
+    matrix = ODMatrix()
+    docs = [{"pickup_location_id": None, "dropoff_location_id": 1}, {"dropoff_location_id": 1}]
+    assert matrix.update_documents(docs) == 0
+    assert not matrix.trips.any()
+
+
+def test_write_od_matrix_replaces_collection() -> None:
+    collection = _FakeCollection()
+    assert write_od_matrix(_matrix(), collection) == 2
+    assert [doc["pickup_location_id"] for doc in collection.docs] == [132, 236]
+
+    assert write_od_matrix(ODMatrix(), collection) == 0
+    assert collection.docs == []
+
+
+def test_build_od_matrix_rebuilds_and_clears_gold(monkeypatch: pytest.MonkeyPatch) -> None:
+    db: defaultdict[str, _FakeCollection] = defaultdict(_FakeCollection)
+    db["trips_clean"].docs = _docs()
+    monkeypatch.setattr(od_matrix, "get_db", lambda: db)
+
+    od_matrix.build_od_matrix(batch_size=2)
+    restored = ODMatrix.from_documents(db["trips_gold_od"].docs)
+    assert np.array_equal(restored.trips, _matrix().trips)
+
+    db["trips_clean"].docs = []
+    od_matrix.build_od_matrix()
+    assert db["trips_gold_od"].docs == []
+
+
+def test_load_zone_lookup_maps_tlc_columns(tmp_path: Path) -> None:
+    path = tmp_path / "taxi_zone_lookup.csv"
+    path.write_text(
+        "LocationID,Borough,Zone,service_zone\n"
+        "1,EWR,Newark Airport,EWR\n"
+        "132,Queens,JFK Airport,Airports\n"
+        "264,,NV,\n"
+    )
+    zones = load_zone_lookup(str(path))
+    assert zones.columns == ["location_id", "borough", "zone"]
+    assert zones["location_id"].to_list() == [1, 132, 264]
+    assert zones["borough"].to_list() == ["EWR", "Queens", UNKNOWN_BOROUGH]
+    assert zones["zone"][1] == "JFK Airport"
+
+
+def test_load_zone_lookup_missing_file_returns_empty_frame(tmp_path: Path) -> None:
+    zones = load_zone_lookup(str(tmp_path / "missing.csv"))
+    assert zones.is_empty()
+    assert zones.schema == {
+        "location_id": pl.Int64,
+        "borough": pl.Utf8,
+        "zone": pl.Utf8,
+    }
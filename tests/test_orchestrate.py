@@ -0,0 +1,190 @@
+import itertools
+import threading
+from collections import defaultdict
+from pathlib import Path
+from typing import Iterable, Iterator
+
+import polars as pl
+import pytest
+
+from bigdata_mongo_taxi.pipeline import orchestrate
+from bigdata_mongo_taxi.pipeline.clean_transform import tidy_record
+from bigdata_mongo_taxi.pipeline.od_matrix import ODMatrix
+from bigdata_mongo_taxi.pipeline.orchestrate import aggregate_batches, run_stages
+
+
+def _double(batches: Iterable[list[int]]) -> Iterator[list[int]]:
+    for batch in batches:
+        yield [value * 2 for value in batch]
+
+
+def test_run_stages_preserves_batch_order() -> None:
+    source = [[1, 2], [3], [4, 5]]
+    result = run_stages(iter(source), [_double, _double], list, queue_size=1)
+    assert result == [[4, 8], [12], [16, 20]]
+
+
+def test_downstream_starts_before_source_finishes() -> None:
+    first_batch_seen = threading.Event()
+
+    def source() -> Iterator[list[int]]:
+        yield [1]
+        assert first_batch_seen.wait(timeout=5)
+        yield [2]
+
+    def sink(batches: Iterable[list[int]]) -> int:
+        total = 0
+        for batch in batches:
+            first_batch_seen.set()
+            total += sum(batch)
+        return total
+
+    assert run_stages(source(), [_double], sink) == 6
+
+
+def test_stage_error_is_raised_and_unblocks_pipeline() -> None:
+    def failing(batches: Iterable[list[int]]) -> Iterator[list[int]]:
+        for _ in batches:
+            raise ValueError("bad batch")
+        yield []
+
+    with pytest.raises(ValueError, match="bad batch"):
+        run_stages(iter([[n] for n in range(100)]), [failing], list, queue_size=1)
+
+
+def _run_with_timeout(*args: object, **kwargs: object) -> list:
+    results: list = []
+    runner = threading.Thread(
+        target=lambda: results.append(run_stages(*args, **kwargs)), daemon=True
+    )
+    runner.start()
+    runner.join(timeout=5)
+    assert not runner.is_alive(), "run_stages did not return"
+    return results
+
+
+def test_short_circuiting_stage_ends_upstream() -> None:
+    def head(batches: Iterable[list[int]]) -> Iterator[list[int]]:
+        yield from itertools.islice(batches, 2)
+
+    source = ([n] for n in itertools.count())
+    results = _run_with_timeout(source, [head, _double], list, queue_size=1)
+    assert results == [[[0], [2]]]
+
+
+def test_short_circuiting_sink_ends_pipeline() -> None:
+    def first(batches: Iterable[list[int]]) -> list[int]:
+        return next(iter(batches))
+
+    source = ([n] for n in itertools.count())
+    results = _run_with_timeout(source, [_double], first, queue_size=1)
+    assert results == [[0]]
+
+
+def _patch_pipeline(
+    monkeypatch: pytest.MonkeyPatch,
+    writes: list[tuple[str, int]],
+    existing_docs: int = 0,
+    fail_at: int | None = 2,
+) -> None:
+    seed = ODMatrix()
+    seed.update_documents([{"pickup_location_id": 1, "dropoff_location_id": 1}] * 3)
+
+    class FakeCollection:
+        def count_documents(self, *args: object, **kwargs: object) -> int:
+            return existing_docs
+
+        def find(self, *args: object, **kwargs: object) -> list[dict]:
+            return seed.to_documents()
+
+    def ingest(*args: object) -> Iterator[list[dict]]:
+        for n in range(5):
+            yield [{"n": n}]
+
+    def clean(raw_batches: Iterable[list[dict]], *args: object) -> Iterator[list[dict]]:
+        for index, batch in enumerate(raw_batches):
+            if index == fail_at:
+                raise RuntimeError("clean failed")
+            yield [
+                {
+                    "pickup_date": "2024-01-01",
+                    "pickup_location_id": 132,
+                    "dropoff_location_id": 236,
+                    "total_amount": 10.0,
+                    "trip_duration_minutes": 5.0,
+                }
+            ]
+
+    monkeypatch.setattr(orchestrate, "get_db", lambda: defaultdict(FakeCollection))
+    monkeypatch.setattr(orchestrate, "ensure_clean_indexes", lambda collection: None)
+    monkeypatch.setattr(orchestrate, "ingest_batches", ingest)
+    monkeypatch.setattr(orchestrate, "clean_batches", clean)
+    monkeypatch.setattr(
+        orchestrate,
+        "write_od_matrix",
+        lambda matrix: writes.append(("od", int(matrix.trips.sum()))) or 0,
+    )
+    monkeypatch.setattr(
+        orchestrate,
+        "write_gold_metrics",
+        lambda df: writes.append(("gold", df.height)) or (0, 0, 0),
+    )
+    monkeypatch.setattr(
+        orchestrate,
+        "load_clean_frame",
+        lambda: writes.append(("load-clean", 0)) or pl.DataFrame({"n": range(8)}),
+    )
+
+
+def test_stage_error_skips_gold_writes(monkeypatch: pytest.MonkeyPatch) -> None:
+    writes: list[tuple[str, int]] = []
+    _patch_pipeline(monkeypatch, writes)
+
+    with pytest.raises(RuntimeError, match="clean failed"):
+        orchestrate.run_pipeline(Path("trips.csv"), queue_size=1)
+    assert writes == []
+
+
+def test_fresh_run_writes_streamed_gold(monkeypatch: pytest.MonkeyPatch) -> None:
+    writes: list[tuple[str, int]] = []
+    _patch_pipeline(monkeypatch, writes, fail_at=None)
+
+    orchestrate.run_pipeline(Path("trips.csv"))
+    assert writes == [("od", 5), ("gold", 5)]
+
+
+def test_run_on_existing_clean_streams_od_and_rebuilds_group_bys(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    writes: list[tuple[str, int]] = []
+    _patch_pipeline(monkeypatch, writes, existing_docs=1, fail_at=None)
+
+    orchestrate.run_pipeline(Path("trips.csv"))
+    # Seeded 3 trips from trips_gold_od plus 5 streamed; metrics use the full collection.
+    assert writes == [("load-clean", 0), ("od", 8), ("gold", 8)]
+
+
+def test_aggregate_batches_keeps_late_non_null_values() -> None:
+    raw = {
+        "VendorID": 1,
+        "tpep_pickup_datetime": "2024-01-01T00:10:00",
+        "tpep_dropoff_datetime": "2024-01-01T00:25:00",
+        "passenger_count": 1,
+        "trip_distance": 2.0,
+        "PULocationID": 132,
+        "DOLocationID": 236,
+        "fare_amount": 10.0,
+        "total_amount": 12.0,
+        "payment_type": 1,
+    }
+    trip = tidy_record(raw)
+    assert trip is not None
+    docs = [trip.model_dump(by_alias=True) for _ in range(151)]
+    docs[-1]["rate_code_id"] = 1
+    docs[-1]["_id"] = object()
+
+    matrix, clean_df = aggregate_batches([docs])
+    assert clean_df.height == 151
+    assert "_id" not in clean_df.columns
+    assert clean_df["rate_code_id"].drop_nulls().to_list() == [1]
+    assert matrix.trips[132, 236] == 151
@@ -0,0 +1,51 @@
+import logging
+from pathlib import Path
+
+import polars as pl
+import pytest
+
+from bigdata_mongo_taxi.pipeline.raw_ingest import ingest_batches
+
+
+class _FakeCollection:
+    def __init__(self) -> None:
+        self.writes: list[int] = []
+
+    def bulk_write(self, operations: list, ordered: bool = False) -> None:
+        self.writes.append(len(operations))
+
+
+def _trips(rows: int) -> pl.DataFrame:
+    return pl.DataFrame(
+        {
+            "VendorID": [1] * rows,
+            "tpep_pickup_datetime": ["2024-01-01 00:10:00"] * rows,
+            "tpep_dropoff_datetime": ["2024-01-01 00:25:00"] * rows,
+            "passenger_count": [1] * rows,
+            "trip_distance": [float(n) for n in range(rows)],
+            "PULocationID": [132] * rows,
+            "DOLocationID": [236] * rows,
+            "fare_amount": [10.0] * rows,
+            "total_amount": [12.0] * rows,
+            "payment_type": [1] * rows,
+        }
+    )
+
+
+@pytest.mark.parametrize("suffix", [".csv", ".parquet"])
+def test_ingest_batches_streams_file_in_slices(tmp_path: Path, suffix: str) -> None:
+    path = tmp_path / f"trips{suffix}"
+    if suffix == ".csv":
+        _trips(25).write_csv(path)
+    else:
+        _trips(25).write_parquet(path)
+    collection = _FakeCollection()
+
+    batches = ingest_batches(path, collection, logging.getLogger(__name__), batch_size=10)
+    first = next(batches)
+    assert len(first) == 10
+    assert collection.writes == [10]
+
+    rest = list(batches)
+    assert [len(batch) for batch in rest] == [10, 5]
+    assert rest[-1][-1]["trip_distance"] == 24.0